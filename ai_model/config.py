@@ -24,7 +24,14 @@ DATASET_CONFIG = {
     "batch_size": 32,
     "validation_split": 0.2,
     "test_split": 0.1,
-    "random_seed": 42
+    "random_seed": 42,
+    # Training order is shuffled in blocks of files/shards, then within a window
+    # of batch_size * fetch_factor examples, instead of a huge shuffle buffer
+    "shuffle_block_size": 16,
+    "fetch_factor": 8,
+    # Per-channel (RGB) normalization applied after scaling pixels to [0, 1]
+    "normalization_mean": (0.0, 0.0, 0.0),
+    "normalization_std": (1.0, 1.0, 1.0)
 }
 
 # Model configuration
@@ -91,6 +98,7 @@ EXPORT_CONFIG = {
     "model_info_path": MODELS_DIR / "model_info.json",
     "disease_info_path": MODELS_DIR / "disease_info_complete.json",
     "quantized_tflite_path": MODELS_DIR / "crop_disease_model_quantized.tflite",
+    "int8_tflite_path": MODELS_DIR / "crop_disease_model_int8.tflite",
     "optimized_tflite_path": MODELS_DIR / "crop_disease_model_optimized.tflite"
 }
 
@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration for the AI model tests
+"""
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "serial: timing-sensitive test, run outside the parallel xdist pass"
+    )
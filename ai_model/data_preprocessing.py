@@ -3,6 +3,7 @@ Data preprocessing module for PlantVillage dataset
 """
 
 import os
+import hashlib
 import zipfile
 import json
 import numpy as np
@@ -17,9 +18,41 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.utils import to_categorical
 
 from .config import DATASET_CONFIG, MODEL_CONFIG, AUGMENTATION_CONFIG, DISEASE_INFO
+from .jit import njit, prange, NUMBA_AVAILABLE
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _fused_normalize(image, out, mean, inv_std, channels_first):
+    """
+    Rescale, normalize and (optionally) transpose an HWC image in one pass
+    """
+    height, width, channels = image.shape
+    for h in prange(height):
+        for w in range(width):
+            for c in range(channels):
+                value = (image[h, w, c] * (1.0 / 255.0) - mean[c]) * inv_std[c]
+                if channels_first:
+                    out[c, h, w] = value
+                else:
+                    out[h, w, c] = value
+
+
+@njit(parallel=True, cache=True)
+def _lut_normalize(image, out, lut, channels_first):
+    """
+    Map a uint8 HWC image through per-channel lookup tables
+    """
+    height, width, channels = image.shape
+    for h in prange(height):
+        for w in range(width):
+            for c in range(channels):
+                value = lut[c, image[h, w, c]]
+                if channels_first:
+                    out[c, h, w] = value
+                else:
+                    out[h, w, c] = value
 
 
 class PlantVillageDataPreprocessor:
@@ -33,6 +66,13 @@ class PlantVillageDataPreprocessor:
         self.batch_size = DATASET_CONFIG["batch_size"]
         self.class_names = MODEL_CONFIG["class_names"]
         self.label_encoder = LabelEncoder()
+        self._label_to_idx = {name: i for i, name in enumerate(self.class_names)}
+        self.norm_mean = np.asarray(DATASET_CONFIG["normalization_mean"], dtype=np.float32)
+        self.norm_inv_std = 1.0 / np.asarray(DATASET_CONFIG["normalization_std"], dtype=np.float32)
+        # uint8 inputs only take 256 values per channel, so normalization is a table lookup
+        self._lut = ((np.arange(256, dtype=np.float32) / 255.0)[None, :] - self.norm_mean[:, None]) \
+            * self.norm_inv_std[:, None]
+        self._lut_channels = np.arange(len(self.norm_mean))
         
     def download_dataset(self, kaggle_username: str = None, kaggle_key: str = None) -> bool:
         """
@@ -64,25 +104,113 @@ class PlantVillageDataPreprocessor:
             print("Please ensure you have kaggle CLI installed and configured")
             return False
     
-    def load_and_preprocess_data(self) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    def normalize_image(self, image: np.ndarray, out: np.ndarray = None,
+                        channels_first: bool = False) -> np.ndarray:
         """
-        Load and preprocess the PlantVillage dataset
+        Scale an HWC image to [0, 1] float32 and apply the channel normalization
+        
+        The result is written to out when given (HWC, or CHW if channels_first),
+        so batch loaders can fill a preallocated array without temporaries.
         """
-        print("Loading and preprocessing PlantVillage dataset...")
+        height, width, channels = image.shape
+        if out is None:
+            shape = (channels, height, width) if channels_first else (height, width, channels)
+            out = np.empty(shape, dtype=np.float32)
         
-        images = []
-        labels = []
-        class_counts = {}
+        if image.dtype == np.uint8:
+            if NUMBA_AVAILABLE:
+                _lut_normalize(image, out, self._lut, channels_first)
+            else:
+                target = out.transpose(1, 2, 0) if channels_first else out
+                target[...] = self._lut[self._lut_channels, image]
+        elif NUMBA_AVAILABLE:
+            _fused_normalize(image, out, self.norm_mean, self.norm_inv_std, channels_first)
+        else:
+            target = out.transpose(1, 2, 0) if channels_first else out
+            np.multiply(image, np.float32(1.0 / 255.0), out=target)
+            target -= self.norm_mean
+            target *= self.norm_inv_std
         
-        # Walk through the dataset directory
+        return out
+    
+    def tf_augment(self, image: tf.Tensor) -> tf.Tensor:
+        """
+        Randomly flip and jitter the colors of an image or a batch of images
+        
+        Safe to use inside tf.data.Dataset.map; uint8 inputs are scaled to [0, 1].
+        Batches (4-D) get independent random values per image from a single
+        set of vectorized ops.
+        """
+        image = tf.image.convert_image_dtype(image, tf.float32)
+        if AUGMENTATION_CONFIG["horizontal_flip"]:
+            image = tf.image.random_flip_left_right(image)
+        
+        # One brightness delta and contrast factor per image: shape [1, 1, 1] or [batch, 1, 1, 1]
+        factor_shape = tf.concat([tf.shape(image)[:-3], [1, 1, 1]], axis=0)
+        image = image + tf.random.uniform(factor_shape, -0.1, 0.1)
+        mean = tf.reduce_mean(image, axis=[-3, -2], keepdims=True)
+        image = (image - mean) * tf.random.uniform(factor_shape, 0.9, 1.1) + mean
+        return tf.clip_by_value(image, 0.0, 1.0)
+    
+    def augment_image(self, image: np.ndarray) -> np.ndarray:
+        """
+        Eagerly augment a single image (see tf_augment)
+        """
+        return self.tf_augment(tf.constant(image)).numpy()
+    
+    def resize_image(self, image: np.ndarray, size: Tuple[int, int],
+                     out: np.ndarray = None) -> np.ndarray:
+        """
+        Resize an image to size (height, width), writing into out when given
+        """
+        return cv2.resize(image, (size[1], size[0]), dst=out, interpolation=cv2.INTER_AREA)
+    
+    def _label_indices(self, labels: List[str]) -> np.ndarray:
+        """
+        Map class names to their index in MODEL_CONFIG["class_names"]
+        """
+        return np.fromiter((self._label_to_idx[label] for label in labels),
+                           dtype=np.int32, count=len(labels))
+    
+    def encode_labels(self, labels: List[str]) -> List[int]:
+        """
+        Encode class names as integer class indices
+        """
+        return self._label_indices(labels).tolist()
+    
+    def _list_image_files(self) -> Dict[str, List[Path]]:
+        """
+        List the image files of every class present in the dataset directory
+        """
+        class_files = {}
         for class_name in self.class_names:
             class_path = self.data_dir / class_name
             if not class_path.exists():
                 print(f"Warning: Class directory {class_name} not found")
                 continue
-                
+            class_files[class_name] = list(class_path.glob("*.jpg"))
+        
+        return class_files
+    
+    def load_and_preprocess_data(self) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """
+        Load and preprocess the PlantVillage dataset
+        """
+        print("Loading and preprocessing PlantVillage dataset...")
+        
+        # Collect the image files first so the output array can be allocated once
+        class_files = self._list_image_files()
+        
+        height, width = self.image_size[1], self.image_size[0]
+        total_files = sum(len(files) for files in class_files.values())
+        X = np.empty((total_files, height, width, 3), dtype=np.float32)
+        resized = np.empty((height, width, 3), dtype=np.uint8)
+        labels = []
+        class_counts = {}
+        
+        for class_name, files in class_files.items():
             class_count = 0
-            for img_file in class_path.glob("*.jpg"):
+            for img_file in files:
                 try:
                     # Load and preprocess image
                     img = cv2.imread(str(img_file))
@@ -92,13 +220,12 @@ class PlantVillageDataPreprocessor:
                     # Convert BGR to RGB
                     img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
                     
-                    # Resize image
-                    img = cv2.resize(img, self.image_size)
+                    # Resize image into the reusable buffer
+                    self.resize_image(img, (height, width), out=resized)
                     
-                    # Normalize pixel values
-                    img = img.astype(np.float32) / 255.0
+                    # Normalize pixel values straight into the output array
+                    self.normalize_image(resized, out=X[len(labels)])
                     
-                    images.append(img)
                     labels.append(class_name)
                     class_count += 1
                     
@@ -109,18 +236,16 @@ class PlantVillageDataPreprocessor:
             class_counts[class_name] = class_count
             print(f"Loaded {class_count} images for class: {class_name}")
         
-        # Convert to numpy arrays
-        X = np.array(images)
-        y = np.array(labels)
+        # Drop slots left by unreadable images
+        X = X[:len(labels)]
         
-        # Encode labels
-        y_encoded = self.label_encoder.fit_transform(y)
-        y_categorical = to_categorical(y_encoded, num_classes=len(self.class_names))
+        # Encode labels as int32 class indices
+        y = self._label_indices(labels).astype(np.int32)
         
         print(f"Total images loaded: {len(X)}")
         print(f"Total classes: {len(self.class_names)}")
         
-        return X, y_categorical, class_counts
+        return X, y, class_counts
     
     def split_data(self, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
@@ -148,6 +273,263 @@ class PlantVillageDataPreprocessor:
         
         return X_train, X_val, X_test, y_train, y_val, y_test
     
+    def split_image_files(self) -> Tuple[Dict[str, Tuple[np.ndarray, np.ndarray]], Dict]:
+        """
+        Split the dataset's image files (not decoded images) into train, validation and test sets
+        
+        Returns {"train"|"val"|"test": (paths, class names)} and the number
+        of image files per class.
+        """
+        class_files = self._list_image_files()
+        paths = np.array([str(path) for files in class_files.values() for path in files])
+        labels = np.array([name for name, files in class_files.items() for _ in files])
+        paths_train, paths_val, paths_test, labels_train, labels_val, labels_test = self.split_data(paths, labels)
+        
+        splits = {
+            "train": (paths_train, labels_train),
+            "val": (paths_val, labels_val),
+            "test": (paths_test, labels_test)
+        }
+        return splits, {name: len(files) for name, files in class_files.items()}
+    
+    def _decode_and_resize(self, encoded: tf.Tensor) -> tf.Tensor:
+        """
+        Decode the central square of JPEG bytes and resize it to the model input size as uint8
+        
+        decode_and_crop_jpeg only decodes the crop window, and the square crop
+        keeps non-square photos from being distorted by the resize.
+        """
+        height, width = self.image_size[1], self.image_size[0]
+        shape = tf.io.extract_jpeg_shape(encoded)
+        side = tf.minimum(shape[0], shape[1])
+        crop_window = tf.stack([(shape[0] - side) // 2, (shape[1] - side) // 2, side, side])
+        image = tf.io.decode_and_crop_jpeg(encoded, crop_window, channels=3)
+        image = tf.image.resize(image, (height, width), method="bilinear", antialias=False)
+        return tf.saturate_cast(tf.round(image), tf.uint8)
+    
+    def create_geometric_augmentation(self) -> tf.keras.Sequential:
+        """
+        Create in-graph rotation, shift and zoom layers matching AUGMENTATION_CONFIG
+        
+        Flips and color jitter are applied by tf_augment.
+        """
+        fill_mode = AUGMENTATION_CONFIG["fill_mode"]
+        return tf.keras.Sequential([
+            tf.keras.layers.RandomRotation(AUGMENTATION_CONFIG["rotation_range"] / 360, fill_mode=fill_mode),
+            tf.keras.layers.RandomTranslation(
+                AUGMENTATION_CONFIG["height_shift_range"],
+                AUGMENTATION_CONFIG["width_shift_range"],
+                fill_mode=fill_mode
+            ),
+            tf.keras.layers.RandomZoom(AUGMENTATION_CONFIG["zoom_range"], fill_mode=fill_mode)
+        ])
+    
+    def _finish_batch(self, images: tf.Tensor, labels: tf.Tensor,
+                      augmentation: tf.keras.Sequential = None):
+        """
+        Turn a batch of uint8 images and class indices into the model's (images, class indices) input
+        
+        Runs after batching, so augmentation and normalization are a few
+        vectorized ops per batch rather than per image. Training batches pass
+        the layers from create_geometric_augmentation, applied after tf_augment.
+        """
+        if augmentation is not None:
+            images = augmentation(self.tf_augment(images), training=True)
+        else:
+            images = tf.image.convert_image_dtype(images, tf.float32)
+        images = (images - self.norm_mean) * self.norm_inv_std
+        return images, tf.cast(labels, tf.int32)
+    
+    def _block_shuffled_files(self, paths: np.ndarray, label_indices: np.ndarray,
+                              batch_size: int) -> tf.data.Dataset:
+        """
+        Yield (path, label) pairs in block-shuffled order, reshuffled every epoch
+        
+        Files are sorted so each block of shuffle_block_size indices covers
+        neighbouring files on disk; only the block order is shuffled, so the
+        shuffle state is one index per block rather than a buffer of images.
+        Indices are gathered fetch_factor batches at a time.
+        """
+        order = np.argsort(paths)
+        sorted_paths = tf.constant(paths[order])
+        sorted_labels = tf.constant(label_indices[order])
+        
+        num_files = len(paths)
+        block_size = DATASET_CONFIG["shuffle_block_size"]
+        num_blocks = -(-num_files // block_size)
+        
+        indices = tf.data.Dataset.range(num_blocks).shuffle(
+            num_blocks, seed=DATASET_CONFIG["random_seed"], reshuffle_each_iteration=True
+        )
+        indices = indices.flat_map(
+            lambda block: tf.data.Dataset.range(block * block_size,
+                                                tf.minimum((block + 1) * block_size, num_files))
+        )
+        
+        return indices.batch(batch_size * DATASET_CONFIG["fetch_factor"]).map(
+            lambda idx: (tf.gather(sorted_paths, idx), tf.gather(sorted_labels, idx)),
+            num_parallel_calls=tf.data.AUTOTUNE
+        ).unbatch()
+    
+    def image_file_dataset(self, paths: np.ndarray, labels: np.ndarray, batch_size: int = None,
+                           training: bool = False, cache_path: str = None) -> tf.data.Dataset:
+        """
+        Stream JPEG files as batches of (image, class index)
+        
+        Files are decoded and resized on parallel CPU workers while the model
+        trains. Training splits are block-shuffled and augmented; the decoded
+        uint8 images of other splits can be cached to cache_path so later
+        epochs skip decoding.
+        """
+        batch_size = batch_size or self.batch_size
+        label_indices = self._label_indices(labels)
+        
+        if training:
+            dataset = self._block_shuffled_files(paths, label_indices, batch_size)
+        else:
+            dataset = tf.data.Dataset.from_tensor_slices((paths, label_indices))
+        dataset = dataset.map(
+            lambda path, label: (self._decode_and_resize(tf.io.read_file(path)), label),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        if training:
+            # Mix images from the fetch_factor batches' worth of blocks in flight
+            dataset = dataset.shuffle(batch_size * DATASET_CONFIG["fetch_factor"],
+                                      seed=DATASET_CONFIG["random_seed"])
+        elif cache_path is not None:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            dataset = dataset.cache(str(cache_path))
+        augmentation = self.create_geometric_augmentation() if training else None
+        dataset = dataset.batch(batch_size).map(
+            lambda images, labels: self._finish_batch(images, labels, augmentation),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        
+        return dataset.prefetch(tf.data.AUTOTUNE)
+    
+    def write_tfrecords(self, shard_size: int = 1024, overwrite: bool = True,
+                        split_files: Tuple[Dict, Dict] = None) -> Dict:
+        """
+        Split the dataset by file and pack each split into TFRecord shards
+        
+        Shards hold up to shard_size examples of encoded JPEG bytes and class
+        index, so training reads a few large files sequentially instead of
+        thousands of small ones. Files are copied without decoding. Existing
+        shards are kept unless overwrite is set. split_files takes an earlier
+        split_image_files() result instead of listing the dataset again.
+        Returns the number of image files per class.
+        """
+        splits, class_counts = split_files or self.split_image_files()
+        
+        data_path = Path("data/preprocessed")
+        data_path.mkdir(parents=True, exist_ok=True)
+        
+        for split, (split_paths, split_labels) in splits.items():
+            existing_shards = list(data_path.glob(f"{split}-*.tfrecord"))
+            if existing_shards and not overwrite:
+                continue
+            
+            # Remove shards from earlier runs, which may have used another shard count
+            for old_shard in existing_shards:
+                old_shard.unlink()
+            
+            num_shards = max(1, -(-len(split_paths) // shard_size))
+            for shard in range(num_shards):
+                shard_path = data_path / f"{split}-{shard:05d}-of-{num_shards:05d}.tfrecord"
+                with tf.io.TFRecordWriter(str(shard_path)) as writer:
+                    for img_file, class_name in zip(split_paths[shard * shard_size:(shard + 1) * shard_size],
+                                                    split_labels[shard * shard_size:(shard + 1) * shard_size]):
+                        encoded = Path(img_file).read_bytes()
+                        if not encoded.startswith(b"\xff\xd8"):
+                            print(f"Skipping {img_file}: not a JPEG file")
+                            continue
+                        
+                        example = tf.train.Example(features=tf.train.Features(feature={
+                            "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[encoded])),
+                            "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[self._label_to_idx[class_name]]))
+                        }))
+                        writer.write(example.SerializeToString())
+        
+        print(f"TFRecord shards saved to {data_path}")
+        
+        return class_counts
+    
+    def _tfrecord_fingerprint(self, split: str) -> str:
+        """
+        Short hash of a split's shard names and sizes and the image size
+        
+        Used to key decoded-image caches, so a rewritten dataset or a new
+        input size never reuses a stale cache.
+        """
+        digest = hashlib.sha1(str(self.image_size).encode())
+        for shard in sorted(Path("data/preprocessed").glob(f"{split}-*.tfrecord")):
+            digest.update(f"{shard.name}:{shard.stat().st_size}".encode())
+        return digest.hexdigest()[:12]
+    
+    def tfrecord_dataset(self, split: str, batch_size: int = None,
+                         training: bool = False, cache: bool = True) -> tf.data.Dataset:
+        """
+        Stream a split written by write_tfrecords as batches of (image, class index)
+        
+        Shards are read in parallel; training splits are shuffled and augmented.
+        With cache set, decoded uint8 images are kept after the first epoch:
+        training shards each in a file under data/preprocessed keyed by the
+        split fingerprint, so the shard order is still reshuffled every epoch;
+        other splits in memory.
+        """
+        batch_size = batch_size or self.batch_size
+        features = {
+            "image": tf.io.FixedLenFeature([], tf.string),
+            "label": tf.io.FixedLenFeature([], tf.int64)
+        }
+        
+        def decode(record):
+            example = tf.io.parse_single_example(record, features)
+            return self._decode_and_resize(example["image"]), example["label"]
+        
+        cache_prefix = None
+        if cache and training:
+            cache_prefix = str(Path("data/preprocessed") / f"cache_{split}_{self._tfrecord_fingerprint(split)}_")
+            if list(Path("data/preprocessed").glob(f"{Path(cache_prefix).name}*.index")):
+                print(f"Reusing decoded {split} images from {cache_prefix}*")
+        
+        def read_shard(shard_path):
+            shard = tf.data.TFRecordDataset(shard_path)
+            if cache_prefix is None:
+                return shard
+            # Cache below the interleave, one file per shard: a cache above it
+            # would replay the first epoch's record order forever
+            shard_name = tf.strings.split(shard_path, os.sep)[-1]
+            return shard.map(decode, num_parallel_calls=tf.data.AUTOTUNE).cache(cache_prefix + shard_name)
+        
+        files = tf.data.Dataset.list_files(
+            str(Path("data/preprocessed") / f"{split}-*.tfrecord"),
+            shuffle=training, seed=DATASET_CONFIG["random_seed"]
+        )
+        # Shards are the shuffle blocks: each batch draws from fetch_factor shards at once
+        dataset = files.interleave(
+            read_shard,
+            cycle_length=DATASET_CONFIG["fetch_factor"],
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not training
+        )
+        if cache_prefix is None:
+            dataset = dataset.map(decode, num_parallel_calls=tf.data.AUTOTUNE)
+            if cache:
+                dataset = dataset.cache()
+        
+        if training:
+            # Shuffle the uint8 images, before they are expanded to float32
+            dataset = dataset.shuffle(batch_size * DATASET_CONFIG["fetch_factor"],
+                                      seed=DATASET_CONFIG["random_seed"])
+        augmentation = self.create_geometric_augmentation() if training else None
+        dataset = dataset.batch(batch_size).map(
+            lambda images, labels: self._finish_batch(images, labels, augmentation),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        
+        return dataset.prefetch(tf.data.AUTOTUNE)
+    
     def create_data_generators(self, X_train: np.ndarray, y_train: np.ndarray,
                              X_val: np.ndarray, y_val: np.ndarray) -> Tuple[ImageDataGenerator, ImageDataGenerator]:
         """
@@ -220,14 +602,20 @@ class PlantVillageDataPreprocessor:
                              y_train: np.ndarray, y_val: np.ndarray, y_test: np.ndarray) -> None:
         """
         Save preprocessed data to disk for later use
+        
+        Images are written as float16 .npy files through a memory map, so they
+        can be loaded back lazily with load_preprocessed_data.
         """
         data_path = Path("data/preprocessed")
         data_path.mkdir(parents=True, exist_ok=True)
         
         # Save numpy arrays
-        np.save(data_path / "X_train.npy", X_train)
-        np.save(data_path / "X_val.npy", X_val)
-        np.save(data_path / "X_test.npy", X_test)
+        for name, X in (("X_train", X_train), ("X_val", X_val), ("X_test", X_test)):
+            images = np.lib.format.open_memmap(data_path / f"{name}.npy", mode='w+',
+                                               dtype=np.float16, shape=X.shape)
+            images[:] = X
+            images.flush()
+            del images
         np.save(data_path / "y_train.npy", y_train)
         np.save(data_path / "y_val.npy", y_val)
         np.save(data_path / "y_test.npy", y_test)
@@ -242,6 +630,9 @@ class PlantVillageDataPreprocessor:
     def load_preprocessed_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
         Load preprocessed data from disk
+        
+        Image arrays are returned as read-only memory maps: pages are read
+        from disk only when a batch touches them.
         """
         data_path = Path("data/preprocessed")
         
@@ -249,13 +640,17 @@ class PlantVillageDataPreprocessor:
             raise FileNotFoundError("Preprocessed data not found. Run preprocessing first.")
         
         # Load numpy arrays
-        X_train = np.load(data_path / "X_train.npy")
-        X_val = np.load(data_path / "X_val.npy")
-        X_test = np.load(data_path / "X_test.npy")
+        X_train = np.load(data_path / "X_train.npy", mmap_mode='r')
+        X_val = np.load(data_path / "X_val.npy", mmap_mode='r')
+        X_test = np.load(data_path / "X_test.npy", mmap_mode='r')
         y_train = np.load(data_path / "y_train.npy")
         y_val = np.load(data_path / "y_val.npy")
         y_test = np.load(data_path / "y_test.npy")
         
+        # Earlier runs stored one-hot labels
+        if y_train.ndim == 2:
+            y_train, y_val, y_test = (np.argmax(y, axis=1).astype(np.int32) for y in (y_train, y_val, y_test))
+        
         # Load label encoder
         import pickle
         with open(data_path / "label_encoder.pkl", 'rb') as f:
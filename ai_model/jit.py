@@ -0,0 +1,17 @@
+"""
+Optional numba support for numeric kernels
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # numba is optional: without it decorated kernels run as plain Python, so
+    # callers with large inputs should check NUMBA_AVAILABLE and use NumPy
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
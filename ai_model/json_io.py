@@ -0,0 +1,51 @@
+"""
+JSON helpers for reading and writing results, metadata and disease info files
+"""
+
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _to_builtin(obj):
+    """
+    Convert numpy arrays and scalars for the stdlib encoder
+    """
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(data) -> bytes:
+    """
+    Serialize data to indented JSON bytes, using orjson when it is installed
+    
+    numpy arrays can be stored in data as-is: orjson serializes them natively
+    and the stdlib fallback converts them only at this point.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    
+    return json.dumps(data, indent=2, default=_to_builtin).encode()
+
+
+def write_json(path, data) -> None:
+    """
+    Write data to path as indented JSON
+    """
+    Path(path).write_bytes(dumps_json(data))
+
+
+def read_json(path):
+    """
+    Parse the JSON file at path, using orjson when it is installed
+    """
+    data = Path(path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    
+    return json.loads(data)
@@ -3,10 +3,12 @@ Model export module for converting trained models to mobile/web formats
 """
 
 import os
+import sys
 import json
+import subprocess
 import numpy as np
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 import tensorflow as tf
 import onnx
 import onnxruntime as ort
@@ -39,17 +41,40 @@ class ModelExporter:
         self.model = load_model(self.model_path)
         return self.model
     
-    def export_to_tflite(self, quantize: bool = True, optimize: bool = True) -> str:
+    def _is_saved_model(self) -> bool:
         """
-        Export model to TensorFlow Lite format with multiple optimization levels
+        Whether model_path points to a SavedModel directory rather than an .h5 file
+        """
+        return Path(self.model_path).is_dir()
+    
+    def _tflite_converter(self) -> tf.lite.TFLiteConverter:
+        """
+        Create a TFLite converter, reading a SavedModel directly when one is available
         """
+        if self._is_saved_model():
+            return tf.lite.TFLiteConverter.from_saved_model(str(self.model_path))
+        
         if self.model is None:
             self.load_model()
+        return tf.lite.TFLiteConverter.from_keras_model(self.model)
+    
+    def export_to_tflite(self, quantize: Union[bool, str] = True, optimize: bool = True,
+                         calibration_data: np.ndarray = None) -> str:
+        """
+        Export model to TensorFlow Lite format with multiple optimization levels
+        
+        quantize=True adds a dynamic-range quantized model (int8 weights).
+        quantize="int8_full" also adds a fully int8 model with uint8 input and
+        output, calibrated on calibration_data (float32 images in model input
+        format, e.g. a couple of hundred validation images).
+        """
+        if quantize == "int8_full" and calibration_data is None:
+            raise ValueError("Full int8 quantization needs calibration_data from the training distribution")
         
         print("Converting to TensorFlow Lite...")
         
         # Export standard TFLite model
-        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        converter = self._tflite_converter()
         tflite_model = converter.convert()
         
         # Save standard model
@@ -64,7 +89,7 @@ class ModelExporter:
         
         # Export optimized model
         if optimize:
-            converter_optimized = tf.lite.TFLiteConverter.from_keras_model(self.model)
+            converter_optimized = self._tflite_converter()
             converter_optimized.optimizations = [tf.lite.Optimize.DEFAULT]
             
             # Add GPU delegation support
@@ -84,24 +109,10 @@ class ModelExporter:
         
         # Export quantized model
         if quantize:
-            converter_quantized = tf.lite.TFLiteConverter.from_keras_model(self.model)
+            # Dynamic-range quantization: int8 weights, float activations and I/O
+            converter_quantized = self._tflite_converter()
             converter_quantized.optimizations = [tf.lite.Optimize.DEFAULT]
             
-            # Set representative dataset for quantization
-            def representative_dataset():
-                # Generate representative data for quantization
-                for _ in range(100):
-                    data = np.random.random((1,) + MODEL_CONFIG["input_shape"]).astype(np.float32)
-                    yield [data]
-            
-            converter_quantized.representative_dataset = representative_dataset
-            converter_quantized.target_spec.supported_ops = [
-                tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
-                tf.lite.OpsSet.TFLITE_BUILTINS
-            ]
-            converter_quantized.inference_input_type = tf.int8
-            converter_quantized.inference_output_type = tf.int8
-            
             quantized_model = converter_quantized.convert()
             
             quantized_path = EXPORT_CONFIG["quantized_tflite_path"]
@@ -113,7 +124,35 @@ class ModelExporter:
             
             # Use quantized model as primary
             self.tflite_model = quantized_model
-            return str(quantized_path)
+            primary_path = quantized_path
+            
+            if quantize == "int8_full":
+                converter_int8 = self._tflite_converter()
+                converter_int8.optimizations = [tf.lite.Optimize.DEFAULT]
+                
+                # Calibrate activation ranges on real images
+                def representative_dataset():
+                    for image in calibration_data:
+                        yield [image[None].astype(np.float32)]
+                
+                converter_int8.representative_dataset = representative_dataset
+                converter_int8.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+                converter_int8.inference_input_type = tf.uint8
+                converter_int8.inference_output_type = tf.uint8
+                
+                int8_model = converter_int8.convert()
+                
+                int8_path = EXPORT_CONFIG["int8_tflite_path"]
+                with open(int8_path, 'wb') as f:
+                    f.write(int8_model)
+                
+                int8_size = os.path.getsize(int8_path) / (1024 * 1024)  # MB
+                print(f"Full int8 TFLite model saved to {int8_path} ({int8_size:.2f} MB)")
+                
+                self.tflite_model = int8_model
+                primary_path = int8_path
+            
+            return str(primary_path)
         
         # Use standard model as primary
         self.tflite_model = tflite_model
@@ -123,11 +162,35 @@ class ModelExporter:
         """
         Export model to ONNX format
         """
+        print("Converting to ONNX...")
+        
+        onnx_path = EXPORT_CONFIG["onnx_model_path"]
+        onnx_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Convert a SavedModel directory with the tf2onnx CLI, no Keras reload needed
+        if self._is_saved_model():
+            result = subprocess.run([
+                sys.executable, "-m", "tf2onnx.convert",
+                "--saved-model", str(self.model_path),
+                "--output", str(onnx_path),
+                "--opset", "13"
+            ], capture_output=True, text=True)
+            
+            if result.returncode != 0:
+                print(f"ONNX conversion failed: {result.stderr}")
+                return None
+            
+            self.onnx_model = onnx.load(str(onnx_path))
+            print(f"ONNX model saved to {onnx_path}")
+            
+            model_size = os.path.getsize(onnx_path) / (1024 * 1024)  # MB
+            print(f"Model size: {model_size:.2f} MB")
+            
+            return str(onnx_path)
+        
         if self.model is None:
             self.load_model()
         
-        print("Converting to ONNX...")
-        
         # Convert to ONNX using tf2onnx
         try:
             import tf2onnx
@@ -140,9 +203,6 @@ class ModelExporter:
             )
             
             # Save model
-            onnx_path = EXPORT_CONFIG["onnx_model_path"]
-            onnx_path.parent.mkdir(parents=True, exist_ok=True)
-            
             with open(onnx_path, 'wb') as f:
                 f.write(onnx_model.SerializeToString())
             
@@ -172,7 +232,7 @@ class ModelExporter:
                 self.tflite_model = f.read()
         
         # Load TFLite interpreter
-        interpreter = tf.lite.Interpreter(model_content=self.tflite_model)
+        interpreter = tf.lite.Interpreter(model_content=self.tflite_model, num_threads=os.cpu_count())
         interpreter.allocate_tensors()
         
         # Get input and output details
@@ -191,14 +251,25 @@ class ModelExporter:
             # Use random test data
             img = np.random.random((1,) + MODEL_CONFIG["input_shape"]).astype(np.float32)
         
+        # Quantize the input for integer-only models
+        input_scale, input_zero_point = input_details[0]['quantization']
+        input_dtype = input_details[0]['dtype']
+        if input_scale:
+            info = np.iinfo(input_dtype)
+            img = np.clip(np.round(img / input_scale + input_zero_point), info.min, info.max)
+        img = img.astype(input_dtype)
+        
         # Set input tensor
         interpreter.set_tensor(input_details[0]['index'], img)
         
         # Run inference
         interpreter.invoke()
         
-        # Get output
+        # Get output, dequantized to probabilities
         output = interpreter.get_tensor(output_details[0]['index'])
+        output_scale, output_zero_point = output_details[0]['quantization']
+        if output_scale:
+            output = (output.astype(np.float32) - output_zero_point) * output_scale
         
         # Get prediction
         predicted_class = np.argmax(output[0])
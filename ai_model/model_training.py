@@ -76,7 +76,8 @@ class CropDiseaseModel:
             layers.Dropout(0.5),
             layers.Dense(512, activation='relu'),
             layers.Dropout(0.3),
-            layers.Dense(self.num_classes, activation='softmax')
+            # float32 softmax keeps the loss stable under mixed precision
+            layers.Dense(self.num_classes, activation='softmax', dtype='float32')
         ])
         
         return model
@@ -105,7 +106,7 @@ class CropDiseaseModel:
             layers.Dropout(0.5),
             layers.Dense(512, activation='relu'),
             layers.Dropout(0.3),
-            layers.Dense(self.num_classes, activation='softmax')
+            layers.Dense(self.num_classes, activation='softmax', dtype='float32')
         ])
         
         return model
@@ -134,7 +135,7 @@ class CropDiseaseModel:
             layers.Dropout(0.5),
             layers.Dense(512, activation='relu'),
             layers.Dropout(0.3),
-            layers.Dense(self.num_classes, activation='softmax')
+            layers.Dense(self.num_classes, activation='softmax', dtype='float32')
         ])
         
         return model
@@ -175,7 +176,7 @@ class CropDiseaseModel:
             layers.Dropout(0.5),
             layers.Dense(256, activation='relu'),
             layers.Dropout(0.3),
-            layers.Dense(self.num_classes, activation='softmax')
+            layers.Dense(self.num_classes, activation='softmax', dtype='float32')
         ])
         
         return model
@@ -186,11 +187,13 @@ class ModelTrainer:
     Handles model training, evaluation, and export
     """
     
-    def __init__(self, model_type: str = "mobilenet_v2"):
+    def __init__(self, model_type: str = "mobilenet_v2", strategy: tf.distribute.Strategy = None):
         self.model_type = model_type
         self.model = None
         self.history = None
         self.preprocessor = PlantVillageDataPreprocessor()
+        # Model variables are created under this strategy's scope (e.g. MirroredStrategy for multi-GPU)
+        self.strategy = strategy or tf.distribute.get_strategy()
         
     def prepare_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
@@ -208,25 +211,114 @@ class ModelTrainer:
         
         return X_train, X_val, X_test, y_train, y_val, y_test
     
-    def train_model(self, X_train: np.ndarray, y_train: np.ndarray,
-                   X_val: np.ndarray, y_val: np.ndarray,
+    def prepare_dataset(self, X: np.ndarray, y: np.ndarray, batch_size: int = None,
+                        training: bool = False) -> tf.data.Dataset:
+        """
+        Build a batched, prefetched tf.data pipeline over in-memory arrays
+        
+        Training pipelines are shuffled and augmented in-graph, so the next
+        batch is prepared on the CPU while the current one trains.
+        """
+        batch_size = batch_size or DATASET_CONFIG["batch_size"]
+        
+        if isinstance(X, np.memmap):
+            dataset = self._memmap_batches(X, y, batch_size, training)
+        else:
+            dataset = tf.data.Dataset.from_tensor_slices((X, y))
+            if training:
+                dataset = dataset.shuffle(1024, seed=DATASET_CONFIG["random_seed"])
+            dataset = dataset.batch(batch_size)
+        if training:
+            # Color jitter and geometric augmentation both run once per batch. The arrays
+            # are already normalized, so augment in [0, 1] and renormalize afterwards,
+            # the same order as the preprocessor's streaming pipelines
+            augmentation = self._create_augmentation()
+            mean, inv_std = self.preprocessor.norm_mean, self.preprocessor.norm_inv_std
+            dataset = dataset.map(
+                lambda images, labels: (
+                    (augmentation(self.preprocessor.tf_augment(images / inv_std + mean), training=True)
+                     - mean) * inv_std,
+                    labels
+                ),
+                num_parallel_calls=tf.data.AUTOTUNE
+            )
+        
+        return dataset.prefetch(tf.data.AUTOTUNE)
+    
+    def _memmap_batches(self, X: np.memmap, y: np.ndarray, batch_size: int,
+                        training: bool) -> tf.data.Dataset:
+        """
+        Read batches from a memory-mapped image array without loading it whole
+        
+        from_tensor_slices would copy the entire array into a tensor, so only
+        sample indices go through tf.data and each batch is gathered from the
+        memory map in a parallel map.
+        """
+        def gather(indices):
+            indices = np.sort(indices)
+            return X[indices].astype(np.float32), y[indices].astype(np.int32)
+        
+        def load_batch(indices):
+            images, labels = tf.numpy_function(gather, [indices], (tf.float32, tf.int32))
+            images.set_shape((None,) + X.shape[1:])
+            labels.set_shape((None,))
+            return images, labels
+        
+        dataset = tf.data.Dataset.range(len(X))
+        if training:
+            dataset = dataset.shuffle(len(X), seed=DATASET_CONFIG["random_seed"])
+        return dataset.batch(batch_size).map(load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+    
+    def _create_augmentation(self) -> keras.Sequential:
+        """
+        Create in-graph geometric augmentation layers matching AUGMENTATION_CONFIG
+        
+        Shared with the preprocessor's streaming pipelines; flips and color
+        jitter are applied to each batch by the preprocessor's tf_augment.
+        """
+        return self.preprocessor.create_geometric_augmentation()
+    
+    def build_and_compile_model(self, use_pretrained: bool = True) -> keras.Model:
+        """
+        Build and compile the model under the trainer's distribution strategy
+        
+        train_model calls this when no model has been built yet; calling it
+        earlier lets model construction overlap with data preparation.
+        """
+        with self.strategy.scope():
+            # Build model
+            crop_model = CropDiseaseModel(self.model_type)
+            self.model = crop_model.build_model(use_pretrained=use_pretrained)
+            
+            # Compile model; float16 compute needs loss scaling to avoid gradient underflow
+            optimizer = optimizers.Adam(learning_rate=MODEL_CONFIG["learning_rate"])
+            if keras.mixed_precision.global_policy().compute_dtype == 'float16':
+                optimizer = keras.mixed_precision.LossScaleOptimizer(optimizer)
+            
+            self.model.compile(
+                optimizer=optimizer,
+                loss=keras.losses.SparseCategoricalCrossentropy(),
+                metrics=[
+                    keras.metrics.SparseCategoricalAccuracy(name='accuracy'),
+                    keras.metrics.SparseTopKCategoricalAccuracy(k=3, name='top3_accuracy')
+                ]
+            )
+        
+        return self.model
+    
+    def train_model(self, X_train, y_train, X_val, y_val,
                    epochs: int = None, batch_size: int = None) -> Dict:
         """
         Train the model
+        
+        X_train/X_val may be numpy arrays (with labels in y_train/y_val) or
+        ready-made tf.data.Datasets, in which case the labels are ignored.
         """
         epochs = epochs or MODEL_CONFIG["epochs"]
         batch_size = batch_size or DATASET_CONFIG["batch_size"]
         
-        # Build model
-        crop_model = CropDiseaseModel(self.model_type)
-        self.model = crop_model.build_model(use_pretrained=True)
-        
-        # Compile model
-        self.model.compile(
-            optimizer=optimizers.Adam(learning_rate=MODEL_CONFIG["learning_rate"]),
-            loss='categorical_crossentropy',
-            metrics=['accuracy', 'top_3_accuracy']
-        )
+        if self.model is None:
+            self.build_and_compile_model()
         
         # Print model summary
         self.model.summary()
@@ -234,16 +326,22 @@ class ModelTrainer:
         # Create callbacks
         callbacks = self._create_callbacks()
         
-        # Create data generators
-        train_datagen, val_datagen = self.preprocessor.create_data_generators(
-            X_train, y_train, X_val, y_val
-        )
+        # Create input pipelines
+        if isinstance(X_train, tf.data.Dataset):
+            train_dataset = X_train
+        else:
+            train_dataset = self.prepare_dataset(X_train, y_train, batch_size, training=True)
+        
+        if isinstance(X_val, tf.data.Dataset):
+            val_dataset = X_val
+        else:
+            val_dataset = self.prepare_dataset(X_val, y_val, batch_size)
         
         # Train model
         print(f"Training {self.model_type} model...")
         self.history = self.model.fit(
-            train_datagen.flow(X_train, y_train, batch_size=batch_size),
-            validation_data=(X_val, y_val),
+            train_dataset,
+            validation_data=val_dataset,
             epochs=epochs,
             callbacks=callbacks,
             verbose=1
@@ -301,19 +399,54 @@ class ModelTrainer:
         
         return callbacks
     
-    def evaluate_model(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
+    def evaluate_model(self, X_test, y_test) -> Dict:
         """
         Evaluate the trained model
+        
+        X_test may be a numpy array or a tf.data.Dataset of
+        (image, class index) batches, in which case y_test is ignored.
         """
         print("Evaluating model...")
         
-        # Predict on test set
-        y_pred = self.model.predict(X_test)
-        y_pred_classes = np.argmax(y_pred, axis=1)
-        y_true_classes = np.argmax(y_test, axis=1)
-        
-        # Calculate metrics
-        test_loss, test_accuracy, test_top3_accuracy = self.model.evaluate(X_test, y_test, verbose=0)
+        # One pass over the test set: each batch's predictions feed the loss,
+        # accuracy and top-3 metrics and the class indices for the report
+        if isinstance(X_test, tf.data.Dataset):
+            # Sample count is unknown until the pass ends, so class indices are collected per batch
+            batches = iter(X_test)
+            y_true_classes = y_pred_classes = None
+        else:
+            batch_size = DATASET_CONFIG["batch_size"]
+            batches = ((X_test[i:i + batch_size], y_test[i:i + batch_size])
+                       for i in range(0, len(X_test), batch_size))
+            # Predicted class indices are written into a preallocated buffer
+            y_true_classes = np.asarray(y_test, dtype=np.int32)
+            y_pred_classes = np.empty(len(y_true_classes), dtype=np.intp)
+        
+        loss_metric = keras.metrics.Mean()
+        accuracy_metric = keras.metrics.SparseCategoricalAccuracy()
+        top3_metric = keras.metrics.SparseTopKCategoricalAccuracy(k=3)
+        
+        true_batches = []
+        pred_batches = []
+        start = 0
+        for images, labels in batches:
+            probabilities = np.asarray(self.model.predict_on_batch(images))
+            loss_metric.update_state(keras.losses.sparse_categorical_crossentropy(labels, probabilities))
+            accuracy_metric.update_state(labels, probabilities)
+            top3_metric.update_state(labels, probabilities)
+            if y_pred_classes is not None:
+                np.argmax(probabilities, axis=1, out=y_pred_classes[start:start + len(probabilities)])
+                start += len(probabilities)
+            else:
+                true_batches.append(np.asarray(labels, dtype=np.int32))
+                pred_batches.append(np.argmax(probabilities, axis=1))
+        
+        test_loss = loss_metric.result().numpy()
+        test_accuracy = accuracy_metric.result().numpy()
+        test_top3_accuracy = top3_metric.result().numpy()
+        if y_pred_classes is None:
+            y_true_classes = np.concatenate(true_batches)
+            y_pred_classes = np.concatenate(pred_batches)
         
         # Classification report
         class_names = [name.split('___')[1] if '___' in name else name for name in MODEL_CONFIG["class_names"]]
@@ -396,9 +529,9 @@ class ModelTrainer:
         axes[0, 1].grid(True)
         
         # Top-3 Accuracy
-        if 'top_3_accuracy' in self.history.history:
-            axes[1, 0].plot(self.history.history['top_3_accuracy'], label='Training Top-3 Accuracy')
-            axes[1, 0].plot(self.history.history['val_top_3_accuracy'], label='Validation Top-3 Accuracy')
+        if 'top3_accuracy' in self.history.history:
+            axes[1, 0].plot(self.history.history['top3_accuracy'], label='Training Top-3 Accuracy')
+            axes[1, 0].plot(self.history.history['val_top3_accuracy'], label='Validation Top-3 Accuracy')
             axes[1, 0].set_title('Model Top-3 Accuracy')
             axes[1, 0].set_xlabel('Epoch')
             axes[1, 0].set_ylabel('Top-3 Accuracy')
@@ -9,7 +9,6 @@ import argparse
 import numpy as np
 import cv2
 from pathlib import Path
-import json
 import time
 
 # Add the ai_model directory to Python path
@@ -17,6 +16,7 @@ sys.path.append(str(Path(__file__).parent))
 
 from model_export import ModelExporter
 from config import MODEL_CONFIG, DISEASE_INFO
+from json_io import write_json
 
 
 def load_test_image(image_path: str, target_size: tuple = (224, 224)) -> np.ndarray:
@@ -73,7 +73,7 @@ def test_keras_model(model_path: str, test_image_path: str = None) -> dict:
         "predicted_class_name": MODEL_CONFIG["class_names"][predicted_class],
         "confidence": float(confidence),
         "inference_time": inference_time,
-        "all_probabilities": predictions[0].tolist()
+        "all_probabilities": predictions[0]
     }
     
     return result
@@ -87,8 +87,9 @@ def test_tflite_model(tflite_path: str, test_image_path: str = None) -> dict:
     
     import tensorflow as tf
     
-    # Load TFLite interpreter
-    interpreter = tf.lite.Interpreter(model_path=tflite_path)
+    # Load TFLite interpreter; setting num_threads enables the XNNPACK
+    # delegate's multi-threaded SIMD kernels on recent TF versions
+    interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=os.cpu_count())
     interpreter.allocate_tensors()
     
     # Get input and output details
@@ -106,6 +107,10 @@ def test_tflite_model(tflite_path: str, test_image_path: str = None) -> dict:
     # Set input tensor
     interpreter.set_tensor(input_details[0]['index'], img)
     
+    # Warm up: the first invoke() also prepares the XNNPACK kernels, so keep
+    # it out of the timed run
+    interpreter.invoke()
+    
     # Run inference
     start_time = time.time()
     interpreter.invoke()
@@ -124,26 +129,51 @@ def test_tflite_model(tflite_path: str, test_image_path: str = None) -> dict:
         "predicted_class_name": MODEL_CONFIG["class_names"][predicted_class],
         "confidence": float(confidence),
         "inference_time": inference_time,
-        "all_probabilities": output[0].tolist()
+        "all_probabilities": output[0]
     }
     
     return result
 
 
+# ONNX Runtime session, IO binding and output buffer per model path, reused
+# across test_onnx_model calls
+_onnx_runners = {}
+
+
+def _get_onnx_runner(onnx_path: str) -> tuple:
+    """
+    Create (or reuse) an ONNX Runtime session bound to a preallocated output
+    """
+    if onnx_path not in _onnx_runners:
+        import onnxruntime as ort
+        
+        sess_opts = ort.SessionOptions()
+        sess_opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_opts.intra_op_num_threads = os.cpu_count()
+        session = ort.InferenceSession(onnx_path, sess_options=sess_opts,
+                                       providers=['CPUExecutionProvider'])
+        
+        # Get input and output names
+        input_name = session.get_inputs()[0].name
+        output_name = session.get_outputs()[0].name
+        
+        # Write results straight into a reusable host buffer
+        out_buf = np.empty((1, len(MODEL_CONFIG["class_names"])), dtype=np.float32)
+        io_binding = session.io_binding()
+        io_binding.bind_output(output_name, 'cpu', 0, np.float32, out_buf.shape, out_buf.ctypes.data)
+        
+        _onnx_runners[onnx_path] = (session, io_binding, input_name, out_buf)
+    
+    return _onnx_runners[onnx_path]
+
+
 def test_onnx_model(onnx_path: str, test_image_path: str = None) -> dict:
     """
     Test ONNX model
     """
     print("Testing ONNX model...")
     
-    import onnxruntime as ort
-    
-    # Create ONNX Runtime session
-    session = ort.InferenceSession(onnx_path)
-    
-    # Get input and output names
-    input_name = session.get_inputs()[0].name
-    output_name = session.get_outputs()[0].name
+    session, io_binding, input_name, out_buf = _get_onnx_runner(onnx_path)
     
     # Prepare test input
     if test_image_path and Path(test_image_path).exists():
@@ -153,14 +183,20 @@ def test_onnx_model(onnx_path: str, test_image_path: str = None) -> dict:
         # Use random test data
         img = np.random.random((1,) + MODEL_CONFIG["input_shape"]).astype(np.float32)
     
+    # Bind the input without an intermediate copy
+    io_binding.bind_cpu_input(input_name, np.ascontiguousarray(img))
+    
     # Run inference
     start_time = time.time()
-    output = session.run([output_name], {input_name: img})
+    session.run_with_iobinding(io_binding)
     inference_time = time.time() - start_time
     
+    # Copy out of the shared buffer so later runs don't overwrite this result
+    probabilities = out_buf[0].copy()
+    
     # Get results
-    predicted_class = np.argmax(output[0][0])
-    confidence = np.max(output[0][0])
+    predicted_class = np.argmax(probabilities)
+    confidence = np.max(probabilities)
     
     result = {
         "model_type": "ONNX",
@@ -168,7 +204,7 @@ def test_onnx_model(onnx_path: str, test_image_path: str = None) -> dict:
         "predicted_class_name": MODEL_CONFIG["class_names"][predicted_class],
         "confidence": float(confidence),
         "inference_time": inference_time,
-        "all_probabilities": output[0][0].tolist()
+        "all_probabilities": probabilities
     }
     
     return result
@@ -275,8 +311,7 @@ def main():
             results_path = Path("results/test_results.json")
             results_path.parent.mkdir(exist_ok=True)
             
-            with open(results_path, 'w') as f:
-                json.dump(test_results, f, indent=2)
+            write_json(results_path, test_results)
             
             print(f"\n📄 Test results saved to {results_path}")
         
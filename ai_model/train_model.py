@@ -9,6 +9,7 @@ import argparse
 from pathlib import Path
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the ai_model directory to Python path
 sys.path.append(str(Path(__file__).parent))
@@ -55,6 +56,11 @@ def main():
     for dir_path in ["models", "results", "data/preprocessed"]:
         Path(dir_path).mkdir(parents=True, exist_ok=True)
     
+    # Background disk writes: the model save and the disease info database
+    io_executor = ThreadPoolExecutor(max_workers=2)
+    save_future = None
+    trainer = None
+    
     try:
         # Step 1: Data Preprocessing
         if not args.skip_training:
@@ -83,19 +89,13 @@ def main():
                 print("Or use --download-data with Kaggle credentials")
                 return
             
-            # Load and preprocess data
+            # Split the dataset and write it as TFRecord shards
             print("Loading and preprocessing dataset...")
-            X, y, class_counts = preprocessor.load_and_preprocess_data()
-            
-            # Split data
-            X_train, X_val, X_test, y_train, y_val, y_test = preprocessor.split_data(X, y)
+            class_counts = preprocessor.write_tfrecords()
             
             # Analyze dataset
             preprocessor.analyze_dataset(class_counts)
             
-            # Save preprocessed data
-            preprocessor.save_preprocessed_data(X_train, X_val, X_test, y_train, y_val, y_test)
-            
             print("✅ Data preprocessing completed!")
         
         # Step 2: Model Training
@@ -105,22 +105,24 @@ def main():
             
             trainer = ModelTrainer(model_type=args.model_type)
             
-            # Prepare data
-            X_train, X_val, X_test, y_train, y_val, y_test = trainer.prepare_data()
+            # Stream the TFRecord shards
+            train_dataset = preprocessor.tfrecord_dataset("train", args.batch_size, training=True)
+            val_dataset = preprocessor.tfrecord_dataset("val", args.batch_size)
+            test_dataset = preprocessor.tfrecord_dataset("test", args.batch_size)
             
             # Train model
             print(f"Training {args.model_type} model...")
             history = trainer.train_model(
-                X_train, y_train, X_val, y_val,
+                train_dataset, None, val_dataset, None,
                 epochs=args.epochs, batch_size=args.batch_size
             )
             
             # Evaluate model
             print("Evaluating model...")
-            results = trainer.evaluate_model(X_test, y_test)
+            results = trainer.evaluate_model(test_dataset, None)
             
-            # Save model
-            trainer.save_model()
+            # Save model in the background
+            save_future = io_executor.submit(trainer.save_model)
             
             print(f"✅ Model training completed!")
             print(f"📈 Test Accuracy: {results['test_accuracy']:.4f}")
@@ -133,21 +135,25 @@ def main():
             
             exporter = ModelExporter(f"models/{args.model_type}_final.h5")
             
-            # Export to TensorFlow Lite
-            print("Exporting to TensorFlow Lite...")
-            tflite_path = exporter.export_to_tflite(quantize=True, optimize=True)
+            # Export from the in-memory model rather than reloading the saved .h5
+            if trainer is not None:
+                exporter.model = trainer.model
+            else:
+                exporter.load_model()
             
-            # Export to ONNX
-            print("Exporting to ONNX...")
-            onnx_path = exporter.export_to_onnx()
+            # The disease database doesn't touch the model, so it is written in the background
+            disease_db_future = io_executor.submit(exporter.create_disease_info_database)
             
-            # Create disease info database
-            print("Creating disease info database...")
-            disease_db_path = exporter.create_disease_info_database()
+            # Exports trace the Keras model, so they must not overlap with model.save; and
+            # the exporter's model_info.json has to replace the one written by save_model
+            if save_future is not None:
+                save_future.result()
             
-            # Create model metadata
-            print("Creating model metadata...")
+            print("Exporting to TensorFlow Lite and ONNX, creating disease info database and model metadata...")
+            tflite_path = exporter.export_to_tflite(quantize=True, optimize=True)
+            onnx_path = exporter.export_to_onnx()
             metadata = exporter.create_model_metadata()
+            disease_db_path = disease_db_future.result()
             
             # Benchmark models
             print("Benchmarking models...")
@@ -155,6 +161,10 @@ def main():
             
             print("✅ Model export completed!")
         
+        # Make sure the trained model is on disk before reporting
+        if save_future is not None:
+            save_future.result()
+        
         # Step 4: Generate Report
         print("\n📋 Step 4: Generating Report")
         print("-" * 40)
@@ -178,7 +188,7 @@ def main():
         print("\n📁 Output Files:")
         print("- models/: Trained models and metadata")
         print("- results/: Training plots and evaluation metrics")
-        print("- data/preprocessed/: Preprocessed dataset")
+        print("- data/preprocessed/: TFRecord shards of the preprocessed dataset")
         
         print("\n🚀 Next Steps:")
         print("1. Integrate TFLite model into mobile app")
@@ -189,6 +199,8 @@ def main():
     except Exception as e:
         print(f"\n❌ Error: {e}")
         raise
+    finally:
+        io_executor.shutdown(wait=True)
 
 
 def generate_training_report(model_type: str, start_time: float):
@@ -6,9 +6,10 @@ Real model training script for PlantVillage dataset
 import os
 import sys
 import argparse
-import json
+import math
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -18,18 +19,22 @@ sys.path.append(str(Path(__file__).parent))
 try:
     import tensorflow as tf
     import numpy as np
-    from sklearn.metrics import classification_report, confusion_matrix
+    import matplotlib
+    matplotlib.use('Agg')
     import matplotlib.pyplot as plt
-    import seaborn as sns
 except ImportError as e:
     print(f"Required packages not installed: {e}")
-    print("Please install: pip install tensorflow scikit-learn matplotlib seaborn")
+    print("Please install: pip install tensorflow matplotlib")
     sys.exit(1)
 
 from data_preprocessing import PlantVillageDataPreprocessor
 from model_training import ModelTrainer
 from model_export import ModelExporter
 from config import MODEL_CONFIG, DATASET_CONFIG, EXPORT_CONFIG
+from json_io import write_json
+
+# Raster resolution for saved plots
+PLOT_DPI = int(os.getenv("PLOT_DPI", "100"))
 
 
 def setup_logging():
@@ -52,7 +57,29 @@ def setup_logging():
     return logging.getLogger(__name__)
 
 
-def download_dataset_if_needed(preprocessor, args):
+def configure_mixed_precision(logger):
+    """Enable mixed precision and XLA when the GPU has tensor cores"""
+    gpus = tf.config.list_physical_devices('GPU')
+    if not gpus:
+        logger.info("No GPU detected, training in float32")
+        return
+    
+    capability = tf.config.experimental.get_device_details(gpus[0]).get('compute_capability', (0, 0))
+    if capability >= (8, 0):
+        # Ampere and newer run bfloat16 at full rate without loss scaling
+        policy = 'mixed_bfloat16'
+    elif capability >= (7, 0):
+        policy = 'mixed_float16'
+    else:
+        logger.info(f"GPU compute capability {capability} has no tensor cores, training in float32")
+        return
+    
+    tf.keras.mixed_precision.set_global_policy(policy)
+    tf.config.optimizer.set_jit(True)
+    logger.info(f"Mixed precision policy: {policy} (XLA enabled)")
+
+
+def download_dataset_if_needed(preprocessor, args, logger):
     """Download dataset if not present"""
     if not preprocessor.data_dir.exists():
         if args.download_data:
@@ -78,50 +105,71 @@ def download_dataset_if_needed(preprocessor, args):
     return True
 
 
+def prepare_datasets(preprocessor, args, logger):
+    """Download and pack the dataset if needed, then build the train/val/test pipelines"""
+    if not download_dataset_if_needed(preprocessor, args, logger):
+        return None
+    
+    # Pack the split image files into TFRecord shards once, then stream them
+    logger.info("Building input pipelines...")
+    split_files = preprocessor.split_image_files()
+    class_counts = preprocessor.write_tfrecords(overwrite=False, split_files=split_files)
+    split_sizes = {split: len(paths) for split, (paths, _) in split_files[0].items()}
+    train_dataset = preprocessor.tfrecord_dataset("train", args.batch_size, training=True)
+    val_dataset = preprocessor.tfrecord_dataset("val", args.batch_size)
+    test_dataset = preprocessor.tfrecord_dataset("test", args.batch_size)
+    
+    return train_dataset, val_dataset, test_dataset, class_counts, split_sizes
+
+
 def analyze_dataset_distribution(class_counts, logger):
     """Analyze and visualize dataset distribution"""
     logger.info("Analyzing dataset distribution...")
     
     # Create distribution plot
     plt.figure(figsize=(15, 8))
-    classes = list(class_counts.keys())
-    counts = list(class_counts.values())
+    classes = list(class_counts)
+    counts = np.fromiter(class_counts.values(), dtype=np.int64, count=len(class_counts))
+    positions = np.arange(len(classes))
     
-    plt.bar(range(len(classes)), counts)
+    plt.bar(positions, counts)
     plt.xlabel('Class Index')
     plt.ylabel('Number of Images')
     plt.title('PlantVillage Dataset Distribution')
-    plt.xticks(range(len(classes)), classes, rotation=45, ha='right')
+    plt.xticks(positions, classes, rotation=45, ha='right')
     plt.tight_layout()
     
     # Save plot
     plot_path = Path("results/class_distribution.png")
-    plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    plt.savefig(plot_path, dpi=PLOT_DPI)
     plt.close()
     
     logger.info(f"Class distribution plot saved to {plot_path}")
     
     # Log statistics
-    total_images = sum(counts)
+    total_images = int(counts.sum())
     logger.info(f"Total images: {total_images}")
     logger.info(f"Number of classes: {len(classes)}")
     logger.info(f"Average images per class: {total_images/len(classes):.1f}")
-    logger.info(f"Min images per class: {min(counts)}")
-    logger.info(f"Max images per class: {max(counts)}")
+    logger.info(f"Min images per class: {counts.min()}")
+    logger.info(f"Max images per class: {counts.max()}")
 
 
-def train_model_with_validation(trainer, X_train, y_train, X_val, y_val, args, logger):
+def train_model_with_validation(trainer, train_dataset, val_dataset, split_sizes, args, logger):
     """Train model with comprehensive validation"""
+    # Interleaved TFRecord pipelines have unknown cardinality, so batch counts come from the split sizes
     logger.info(f"Training {args.model_type} model...")
-    logger.info(f"Training samples: {len(X_train)}")
-    logger.info(f"Validation samples: {len(X_val)}")
+    logger.info(f"Training images: {split_sizes['train']} "
+                f"({math.ceil(split_sizes['train'] / args.batch_size)} batches)")
+    logger.info(f"Validation images: {split_sizes['val']} "
+                f"({math.ceil(split_sizes['val'] / args.batch_size)} batches)")
     logger.info(f"Epochs: {args.epochs}")
     logger.info(f"Batch size: {args.batch_size}")
     
     # Train model
     start_time = time.time()
     history = trainer.train_model(
-        X_train, y_train, X_val, y_val,
+        train_dataset, None, val_dataset, None,
         epochs=args.epochs, batch_size=args.batch_size
     )
     training_time = time.time() - start_time
@@ -162,45 +210,124 @@ def plot_training_history(history, logger):
     
     # Save plot
     plot_path = Path("results/training_history.png")
-    plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    plt.savefig(plot_path, dpi=PLOT_DPI)
     plt.close()
     
     logger.info(f"Training history plot saved to {plot_path}")
 
 
-def evaluate_model_comprehensively(trainer, X_test, y_test, logger):
+def compute_confusion_matrix(y_true, y_pred, num_classes):
+    """Count (true, predicted) class pairs in a single bincount pass"""
+    return np.bincount(
+        y_true.astype(np.int64) * num_classes + y_pred,
+        minlength=num_classes * num_classes
+    ).reshape(num_classes, num_classes)
+
+
+def classification_report_from_confusion_matrix(cm, class_names):
+    """Per-class precision/recall/F1 in sklearn's classification_report dict layout"""
+    tp = np.diag(cm)
+    predicted = cm.sum(axis=0)
+    support = cm.sum(axis=1)
+    precision = tp / np.maximum(predicted, 1)
+    recall = tp / np.maximum(support, 1)
+    f1 = 2 * precision * recall / np.maximum(precision + recall, 1e-9)
+    total = support.sum()
+    
+    report = {
+        name: {
+            'precision': float(precision[i]),
+            'recall': float(recall[i]),
+            'f1-score': float(f1[i]),
+            'support': int(support[i])
+        }
+        for i, name in enumerate(class_names)
+    }
+    report['accuracy'] = float(tp.sum() / max(total, 1))
+    report['macro avg'] = {
+        'precision': float(precision.mean()),
+        'recall': float(recall.mean()),
+        'f1-score': float(f1.mean()),
+        'support': int(total)
+    }
+    weights = support / max(total, 1)
+    report['weighted avg'] = {
+        'precision': float(precision @ weights),
+        'recall': float(recall @ weights),
+        'f1-score': float(f1 @ weights),
+        'support': int(total)
+    }
+    return report
+
+
+def evaluate_model_comprehensively(trainer, test_dataset, logger, use_sklearn=False):
     """Comprehensive model evaluation"""
     logger.info("Evaluating model...")
     
-    # Get predictions
-    y_pred = trainer.model.predict(X_test)
-    y_pred_classes = np.argmax(y_pred, axis=1)
-    y_true_classes = np.argmax(y_test, axis=1)
-    
-    # Calculate metrics
-    test_loss, test_accuracy = trainer.model.evaluate(X_test, y_test, verbose=0)
-    
-    # Top-3 accuracy
-    top3_accuracy = tf.keras.metrics.top_k_categorical_accuracy(y_test, y_pred, k=3).numpy()
+    model = trainer.model
+    loss_metric = tf.keras.metrics.Mean()
+    accuracy_metric = tf.keras.metrics.SparseCategoricalAccuracy()
+    top3_metric = tf.keras.metrics.SparseTopKCategoricalAccuracy(k=3)
+    
+    # Fixed input signature, so XLA compiles the forward pass once per batch shape
+    # and fuses conv/batch-norm/activation kernels
+    @tf.function(jit_compile=True,
+                 input_signature=[tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)])
+    def infer(images):
+        return tf.cast(model(images, training=False), tf.float32)
+    
+    @tf.function
+    def eval_step(images, labels):
+        probabilities = infer(images)
+        loss_metric.update_state(tf.keras.losses.sparse_categorical_crossentropy(labels, probabilities))
+        accuracy_metric.update_state(labels, probabilities)
+        top3_metric.update_state(labels, probabilities)
+        return labels, tf.argmax(probabilities, axis=-1, output_type=tf.int32)
+    
+    # One forward pass per batch: metrics accumulate on device and only the
+    # int32 class indices come back to the host
+    true_batches, pred_batches = [], []
+    for images, labels in test_dataset:
+        true_classes, pred_classes = eval_step(images, labels)
+        true_batches.append(true_classes.numpy())
+        pred_batches.append(pred_classes.numpy())
+    y_true_classes = np.concatenate(true_batches)
+    y_pred_classes = np.concatenate(pred_batches)
+    
+    test_loss = float(loss_metric.result())
+    test_accuracy = float(accuracy_metric.result())
+    top3_accuracy = float(top3_metric.result())
     
     logger.info(f"Test Accuracy: {test_accuracy:.4f}")
     logger.info(f"Test Loss: {test_loss:.4f}")
     logger.info(f"Top-3 Accuracy: {top3_accuracy:.4f}")
     
-    # Classification report
+    # Classification report, derived from the confusion matrix
     class_names = MODEL_CONFIG["class_names"]
-    report = classification_report(y_true_classes, y_pred_classes, 
-                                 target_names=class_names, output_dict=True)
+    cm = compute_confusion_matrix(y_true_classes, y_pred_classes, len(class_names))
+    report = classification_report_from_confusion_matrix(cm, class_names)
+    
+    if use_sklearn:
+        from sklearn.metrics import classification_report
+        sklearn_report = classification_report(
+            y_true_classes, y_pred_classes, labels=range(len(class_names)),
+            target_names=class_names, output_dict=True, zero_division=0
+        )
+        mismatches = [name for name in class_names
+                      if not np.isclose(report[name]['f1-score'], sklearn_report[name]['f1-score'])]
+        if mismatches:
+            logger.warning(f"F1 differs from sklearn for: {', '.join(mismatches)}")
+        else:
+            logger.info("Classification report matches sklearn")
     
     # Save detailed report
     report_path = Path("results/classification_report.json")
-    with open(report_path, 'w') as f:
-        json.dump(report, f, indent=2)
+    write_json(report_path, report)
     
     logger.info(f"Classification report saved to {report_path}")
     
     # Confusion matrix
-    plot_confusion_matrix(y_true_classes, y_pred_classes, class_names, logger)
+    plot_confusion_matrix(cm, class_names, logger)
     
     return {
         'test_accuracy': test_accuracy,
@@ -210,39 +337,61 @@ def evaluate_model_comprehensively(trainer, X_test, y_test, logger):
     }
 
 
-def plot_confusion_matrix(y_true, y_pred, class_names, logger):
+def plot_confusion_matrix(cm, class_names, logger):
     """Plot and save confusion matrix"""
-    cm = confusion_matrix(y_true, y_pred)
+    num_classes = len(class_names)
     
-    plt.figure(figsize=(20, 16))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                xticklabels=class_names, yticklabels=class_names)
+    # Row-normalize so every class is readable regardless of its support
+    cm_normalized = cm / np.maximum(cm.sum(axis=1, keepdims=True), 1)
+    
+    plt.figure(figsize=(8, 6))
+    plt.imshow(cm_normalized, cmap='Blues', vmin=0.0, vmax=1.0)
+    plt.colorbar()
     plt.title('Confusion Matrix')
     plt.xlabel('Predicted')
     plt.ylabel('True')
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
+    plt.xticks(range(num_classes), class_names, rotation=45, ha='right', fontsize=5)
+    plt.yticks(range(num_classes), class_names, rotation=0, fontsize=5)
     plt.tight_layout()
     
     # Save plot
     plot_path = Path("results/confusion_matrix.png")
-    plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    plt.savefig(plot_path, dpi=PLOT_DPI)
     plt.close()
     
     logger.info(f"Confusion matrix saved to {plot_path}")
 
 
-def export_models_comprehensively(trainer, logger):
+def sample_calibration_images(dataset, num_images=200):
+    """Take float32 model-input images from a dataset to calibrate int8 quantization"""
+    images = []
+    for batch, _ in dataset:
+        images.append(batch.numpy())
+        if sum(len(b) for b in images) >= num_images:
+            break
+    return np.concatenate(images)[:num_images]
+
+
+def save_savedmodel(model, model_path: Path) -> None:
+    """Write model as a SavedModel directory; Keras 3 (TF 2.16+) only writes SavedModels via Model.export"""
+    if hasattr(model, "export"):
+        model.export(str(model_path))
+    else:
+        tf.saved_model.save(model, str(model_path))
+
+
+def export_models_comprehensively(trainer, logger, calibration_data=None):
     """Export models in multiple formats"""
     logger.info("Exporting models...")
     
-    # Save Keras model
-    model_path = Path("models") / f"{trainer.model_type}_final.h5"
-    trainer.model.save(model_path)
-    logger.info(f"Keras model saved to {model_path}")
+    # Save once as a SavedModel, which the TFLite converter and tf2onnx read directly
+    model_path = Path("models") / f"{trainer.model_type}_final_savedmodel"
+    save_savedmodel(trainer.model, model_path)
+    logger.info(f"SavedModel saved to {model_path}")
     
     # Export to TensorFlow Lite
     exporter = ModelExporter(str(model_path))
+    exporter.model = trainer.model
     
     # Export standard TFLite
     tflite_path = exporter.export_to_tflite(quantize=False, optimize=False)
@@ -252,8 +401,13 @@ def export_models_comprehensively(trainer, logger):
     tflite_opt_path = exporter.export_to_tflite(quantize=False, optimize=True)
     logger.info(f"Optimized TFLite model: {tflite_opt_path}")
     
-    # Export quantized TFLite
-    tflite_quant_path = exporter.export_to_tflite(quantize=True, optimize=True)
+    # Export quantized TFLite, fully int8 when calibration images are available
+    if calibration_data is not None:
+        tflite_quant_path = exporter.export_to_tflite(
+            quantize="int8_full", optimize=True, calibration_data=calibration_data
+        )
+    else:
+        tflite_quant_path = exporter.export_to_tflite(quantize=True, optimize=True)
     logger.info(f"Quantized TFLite model: {tflite_quant_path}")
     
     # Export to ONNX
@@ -334,8 +488,7 @@ def generate_comprehensive_report(args, training_time, evaluation_results, expor
     
     # Save report
     report_path = Path("results/comprehensive_training_report.json")
-    with open(report_path, 'w') as f:
-        json.dump(report, f, indent=2)
+    write_json(report_path, report)
     
     logger.info(f"Comprehensive report saved to {report_path}")
     
@@ -362,11 +515,14 @@ def main():
                        help="Skip training and only export existing model")
     parser.add_argument("--skip-export", action="store_true",
                        help="Skip export and only train model")
+    parser.add_argument("--use-sklearn", action="store_true",
+                       help="Cross-check the classification report against scikit-learn")
     
     args = parser.parse_args()
     
     # Setup logging
     logger = setup_logging()
+    configure_mixed_precision(logger)
     
     logger.info("=" * 60)
     logger.info("🌱 AI-Powered Crop Disease Detection for Smallholder Farmers")
@@ -387,42 +543,51 @@ def main():
             
             preprocessor = PlantVillageDataPreprocessor()
             
-            # Check and download dataset
-            if not download_dataset_if_needed(preprocessor, args):
-                return
+            # Replicate training across all GPUs, keeping --batch-size per replica
+            if len(tf.config.list_physical_devices('GPU')) > 1:
+                strategy = tf.distribute.MirroredStrategy()
+            else:
+                strategy = tf.distribute.get_strategy()
+            args.batch_size *= strategy.num_replicas_in_sync
+            logger.info(f"Replicas in sync: {strategy.num_replicas_in_sync}")
+            logger.info(f"Global batch size: {args.batch_size}")
             
-            # Load and preprocess data
-            logger.info("Loading and preprocessing dataset...")
-            X, y, class_counts = preprocessor.load_and_preprocess_data()
+            # Download and pack the dataset in the background while the model is
+            # built, so weight download and GPU initialization overlap with data I/O
+            trainer = ModelTrainer(model_type=args.model_type, strategy=strategy)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                datasets_future = executor.submit(prepare_datasets, preprocessor, args, logger)
+                logger.info("Building model while the dataset is prepared...")
+                trainer.build_and_compile_model()
+                datasets = datasets_future.result()
             
-            # Split data
-            X_train, X_val, X_test, y_train, y_val, y_test = preprocessor.split_data(X, y)
+            if datasets is None:
+                return
+            train_dataset, val_dataset, test_dataset, class_counts, split_sizes = datasets
             
             # Analyze dataset
             analyze_dataset_distribution(class_counts, logger)
             
-            # Save preprocessed data
-            preprocessor.save_preprocessed_data(X_train, X_val, X_test, y_train, y_val, y_test)
-            
             logger.info("✅ Data preprocessing completed!")
             
             # Step 2: Model Training
             logger.info("🤖 Step 2: Model Training")
             logger.info("-" * 40)
             
-            trainer = ModelTrainer(model_type=args.model_type)
-            
             # Train model
-            history = train_model_with_validation(trainer, X_train, y_train, X_val, y_val, args, logger)
+            history = train_model_with_validation(trainer, train_dataset, val_dataset, split_sizes, args, logger)
             
             # Evaluate model
             logger.info("📊 Step 3: Model Evaluation")
             logger.info("-" * 40)
             
-            evaluation_results = evaluate_model_comprehensively(trainer, X_test, y_test, logger)
+            evaluation_results = evaluate_model_comprehensively(
+                trainer, test_dataset, logger, use_sklearn=args.use_sklearn
+            )
             
-            # Save model
-            trainer.save_model()
+            # The export step writes the model as a SavedModel; save the .h5 only when it is skipped
+            if args.skip_export:
+                trainer.save_model()
             
             logger.info("✅ Model training and evaluation completed!")
         
@@ -436,7 +601,11 @@ def main():
                 trainer = ModelTrainer(model_type=args.model_type)
                 trainer.load_model()
             
-            export_results = export_models_comprehensively(trainer, logger)
+            calibration_data = None
+            if not args.skip_training:
+                calibration_data = sample_calibration_images(val_dataset)
+            
+            export_results = export_models_comprehensively(trainer, logger, calibration_data)
             
             logger.info("✅ Model export completed!")
         
@@ -474,7 +643,7 @@ def main():
         logger.info("\n📁 Output Files:")
         logger.info("- models/: Trained models and metadata")
         logger.info("- results/: Training plots and evaluation metrics")
-        logger.info("- data/preprocessed/: Preprocessed dataset")
+        logger.info("- data/preprocessed/: TFRecord shards of the dataset")
         
         logger.info("\n🚀 Next Steps:")
         logger.info("1. Integrate TFLite model into mobile app")
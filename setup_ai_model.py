@@ -9,9 +9,12 @@ import sys
 import subprocess
 import json
 import time
+import shutil
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from ai_model.json_io import write_json
+
 def print_banner():
     """Print project banner"""
     print("=" * 70)
@@ -44,16 +47,22 @@ def install_requirements(requirements_file: str = "requirements_ai.txt"):
         return False
     
     try:
-        # Install requirements
-        result = subprocess.run([
-            sys.executable, "-m", "pip", "install", "-r", requirements_file
-        ], capture_output=True, text=True)
+        # Prefer uv's resolver when available, otherwise pip with binary wheels;
+        # output goes straight to the terminal so progress stays visible
+        if shutil.which("uv"):
+            command = ["uv", "pip", "install", "--python", sys.executable, "-r", requirements_file]
+        else:
+            command = [
+                sys.executable, "-m", "pip", "install", "--prefer-binary", "-r", requirements_file
+            ]
+        
+        result = subprocess.run(command)
         
         if result.returncode == 0:
             print("✅ Requirements installed successfully")
             return True
         else:
-            print(f"❌ Failed to install requirements: {result.stderr}")
+            print(f"❌ Failed to install requirements (exit code {result.returncode})")
             return False
             
     except Exception as e:
@@ -171,6 +180,27 @@ def download_plantvillage_dataset():
         return False
 
 
+def pack_dataset_tfrecords():
+    """Pack the downloaded dataset into TFRecord shards for sequential reads"""
+    print("📦 Packing dataset into TFRecord shards...")
+    
+    try:
+        from ai_model.data_preprocessing import PlantVillageDataPreprocessor
+        
+        preprocessor = PlantVillageDataPreprocessor()
+        if not preprocessor.data_dir.exists():
+            print("⚠️  Dataset not found. Skipping TFRecord packing")
+            return False
+        
+        preprocessor.write_tfrecords(overwrite=False)
+        print("✅ Dataset packed into data/preprocessed/")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error packing dataset: {e}")
+        return False
+
+
 def run_initial_tests():
     """Run initial tests to verify setup"""
     print("🧪 Running initial tests...")
@@ -289,8 +319,7 @@ def generate_setup_report():
     
     # Save report
     report_path = Path("results/setup_report.json")
-    with open(report_path, 'w') as f:
-        json.dump(report, f, indent=2)
+    write_json(report_path, report)
     
     print(f"✅ Setup report saved to {report_path}")
 
@@ -303,19 +332,20 @@ def main():
     if not check_python_version():
         sys.exit(1)
     
+    # Setup Kaggle credentials first, since it may prompt for input
+    kaggle_configured = setup_kaggle_credentials()
+    
     # Create project structure
     create_project_structure()
     
-    # Install requirements
+    # Install requirements; they provide the Kaggle CLI and TensorFlow used below
     if not install_requirements():
         print("⚠️  Requirements installation failed. Continuing with basic setup...")
     
-    # Setup Kaggle credentials
-    kaggle_configured = setup_kaggle_credentials()
-    
-    # Download dataset if Kaggle is configured
+    # Download the dataset if Kaggle is configured, then pack it into TFRecord shards
     if kaggle_configured:
-        download_plantvillage_dataset()
+        if download_plantvillage_dataset():
+            pack_dataset_tfrecords()
     else:
         print("📋 Dataset download skipped. Please download manually.")
     